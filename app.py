@@ -8,9 +8,11 @@ Run with:
 import streamlit as st
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
+from matplotlib.figure import Figure
+import numpy as np
 import pandas as pd
 
-from backtester import Backtester
+from backtester import Backtester, download_prices
 from strategy import MovingAverageCrossover
 
 # ── Page config ───────────────────────────────────────────────────────────────
@@ -20,6 +22,62 @@ st.set_page_config(
     layout="wide",
 )
 
+# ── Cached stages ─────────────────────────────────────────────────────────────
+@st.cache_data(ttl=3600, show_spinner=False)
+def _download(ticker: str, start: str, end: str) -> pd.DataFrame:
+    return download_prices(ticker, start, end)
+
+
+# The frames come from the stages above, so (ticker, start, end[, windows])
+# already identifies them; the leading underscore keeps Streamlit from
+# hashing every cell on each rerun.
+@st.cache_data(ttl=3600, show_spinner=False)
+def _generate_signals(_prices: pd.DataFrame, ticker: str, start: str, end: str,
+                      short_window: int, long_window: int) -> pd.DataFrame:
+    strategy = MovingAverageCrossover(short_window=short_window, long_window=long_window)
+    return strategy.generate_signals(_prices)
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _run_simulation(_prices: pd.DataFrame, _signals: pd.DataFrame, ticker: str, start: str, end: str,
+                    short_window: int, long_window: int, initial_cash: float) -> dict:
+    bt = Backtester(ticker=ticker, start=start, end=end, initial_cash=initial_cash)
+    return bt.simulate(_prices, _signals)
+
+
+def _figure_shell() -> tuple[Figure, list]:
+    """
+    This session's styled 3-panel figure, built on its first rerun and kept in
+    st.session_state. Later reruns only drop the previous data artists, so the
+    styling, axis labels and date formatting survive without being redone.
+    """
+    if "figure_shell" not in st.session_state:
+        fig  = Figure(figsize=(14, 11))
+        axes = fig.subplots(3, 1, gridspec_kw={"height_ratios": [3, 2, 1.5]})
+        fig.patch.set_facecolor("#0f1117")
+        for ax in axes:
+            ax.set_facecolor("#1a1d27")
+            ax.tick_params(colors="#aaaaaa")
+            ax.spines[:].set_color("#333344")
+            ax.yaxis.label.set_color("#cccccc")
+            ax.xaxis.label.set_color("#cccccc")
+            ax.title.set_color("#eeeeee")
+            ax.xaxis.set_major_formatter(mdates.DateFormatter("%Y-%m"))
+            ax.xaxis.set_major_locator(mdates.MonthLocator(interval=3))
+        axes[0].set_ylabel("Price (USD)")
+        axes[1].set_ylabel("Value (USD)")
+        axes[2].set_ylabel("Drawdown (%)")
+        st.session_state.figure_shell = (fig, axes)
+
+    fig, axes = st.session_state.figure_shell
+    for ax in axes:
+        for artist in [*ax.lines, *ax.collections]:
+            artist.remove()
+        if ax.get_legend() is not None:
+            ax.get_legend().remove()
+        ax.relim()
+    return fig, axes
+
 # ── Title ─────────────────────────────────────────────────────────────────────
 st.title("📈 Stock Backtesting Dashboard")
 st.markdown("Simulate a **Moving Average Crossover** strategy on any stock and compare it to buy & hold.")
@@ -57,29 +115,30 @@ if not run:
     st.info("👈 Configure your settings in the sidebar and click **Run Backtest** to get started.")
     st.stop()
 
+# Canonical ISO dates: passed to yfinance as-is and used as stable cache keys
+start_iso = start_date.isoformat()
+end_iso   = end_date.isoformat()
+
 # Run backtest
 with st.spinner(f"Downloading {ticker} data and running backtest…"):
     try:
-        strategy = MovingAverageCrossover(short_window=short_window, long_window=long_window)
-        bt = Backtester(
-            ticker=ticker,
-            start=str(start_date),
-            end=str(end_date),
-            initial_cash=initial_cash
-        )
-        results = bt.run(strategy)
+        prices  = _download(ticker, start_iso, end_iso)
+        signals = _generate_signals(prices, ticker, start_iso, end_iso, short_window, long_window)
+        results = _run_simulation(prices, signals, ticker, start_iso, end_iso, short_window, long_window, initial_cash)
     except Exception as e:
         st.error(f"Something went wrong: {e}")
         st.stop()
 
 m   = results["metrics"]
 data      = results["data"]
+signals   = results["signals"]
 portfolio = results["portfolio"]
-buy_hold  = results["buy_hold"]
+drawdown  = results["drawdown"]
+buy_hold  = data["Close"] * results["buy_hold_shares"]
 trades    = results["trades"]
 
 # ── Metrics row ───────────────────────────────────────────────────────────────
-st.subheader(f"Results for {ticker}  •  {start_date} → {end_date}")
+st.subheader(f"Results for {ticker}  •  {start_iso} → {end_iso}")
 
 c1, c2, c3, c4, c5 = st.columns(5)
 c1.metric("Final Value",      f"${m['final_value']:,.0f}")
@@ -93,35 +152,22 @@ c5.metric("Win Rate",         f"{m['win_rate']:.0f}%",
 st.divider()
 
 # ── Charts ────────────────────────────────────────────────────────────────────
-buys  = [t for t in trades if t["type"] == "BUY"]
-sells = [t for t in trades if t["type"] == "SELL"]
-
-fig, axes = plt.subplots(3, 1, figsize=(14, 11), gridspec_kw={"height_ratios": [3, 2, 1.5]})
-fig.patch.set_facecolor("#0f1117")
-for ax in axes:
-    ax.set_facecolor("#1a1d27")
-    ax.tick_params(colors="#aaaaaa")
-    ax.spines[:].set_color("#333344")
-    ax.yaxis.label.set_color("#cccccc")
-    ax.xaxis.label.set_color("#cccccc")
-    ax.title.set_color("#eeeeee")
+buys  = trades.buys
+sells = trades.sells
+
+fig, axes = _figure_shell()
 
 # Panel 1 — Price + MAs + signals
 ax1 = axes[0]
-ax1.plot(data.index, data["Close"],    color="#4fc3f7", lw=1.2, label="Close Price", alpha=0.9)
-ax1.plot(data.index, data["short_ma"], color="#ffb74d", lw=1.4, label=f"{short_window}-day MA", linestyle="--")
-ax1.plot(data.index, data["long_ma"],  color="#ef5350", lw=1.4, label=f"{long_window}-day MA",  linestyle="--")
-for t in buys:
-    ax1.scatter(t["date"], t["price"], marker="^", color="#00e676", s=100, zorder=5)
-for t in sells:
-    ax1.scatter(t["date"], t["price"], marker="v", color="#ff5252", s=100, zorder=5)
+ax1.plot(data.index, data["Close"],       color="#4fc3f7", lw=1.2, label="Close Price", alpha=0.9)
+ax1.plot(data.index, signals["short_ma"], color="#ffb74d", lw=1.4, label=f"{short_window}-day MA", linestyle="--")
+ax1.plot(data.index, signals["long_ma"],  color="#ef5350", lw=1.4, label=f"{long_window}-day MA",  linestyle="--")
+ax1.scatter(buys.dates,  buys.prices,  marker="^", color="#00e676", s=100, zorder=5)
+ax1.scatter(sells.dates, sells.prices, marker="v", color="#ff5252", s=100, zorder=5)
 ax1.scatter([], [], marker="^", color="#00e676", s=80, label="BUY")
 ax1.scatter([], [], marker="v", color="#ff5252", s=80, label="SELL")
 ax1.set_title(f"{ticker} — Price & Signals")
-ax1.set_ylabel("Price (USD)")
 ax1.legend(loc="upper left", framealpha=0.3, labelcolor="white", facecolor="#1a1d27")
-ax1.xaxis.set_major_formatter(mdates.DateFormatter("%Y-%m"))
-ax1.xaxis.set_major_locator(mdates.MonthLocator(interval=3))
 plt.setp(ax1.xaxis.get_majorticklabels(), rotation=30, ha="right")
 
 # Panel 2 — Portfolio vs B&H
@@ -132,26 +178,18 @@ ax2.plot(buy_hold.index, buy_hold.values,   color="#4db6ac", lw=1.8,
          linestyle="--", label=f"Buy & Hold ({m['buy_hold_return']:+.1f}%)")
 ax2.axhline(y=portfolio.iloc[0], color="#555566", lw=1, linestyle=":")
 ax2.set_title("Portfolio Value vs. Buy & Hold")
-ax2.set_ylabel("Value (USD)")
 ax2.legend(loc="upper left", framealpha=0.3, labelcolor="white", facecolor="#1a1d27")
-ax2.xaxis.set_major_formatter(mdates.DateFormatter("%Y-%m"))
-ax2.xaxis.set_major_locator(mdates.MonthLocator(interval=3))
 plt.setp(ax2.xaxis.get_majorticklabels(), rotation=30, ha="right")
 
 # Panel 3 — Drawdown
 ax3 = axes[2]
-rolling_max = portfolio.cummax()
-drawdown    = (portfolio - rolling_max) / rolling_max * 100
 ax3.fill_between(drawdown.index, drawdown.values, 0, color="#ef5350", alpha=0.5)
 ax3.plot(drawdown.index, drawdown.values, color="#ef5350", lw=1)
 ax3.axhline(0, color="#555566", lw=0.8)
 ax3.set_title(f"Drawdown  (Max: {m['max_drawdown']:.1f}%)")
-ax3.set_ylabel("Drawdown (%)")
-ax3.xaxis.set_major_formatter(mdates.DateFormatter("%Y-%m"))
-ax3.xaxis.set_major_locator(mdates.MonthLocator(interval=3))
 plt.setp(ax3.xaxis.get_majorticklabels(), rotation=30, ha="right")
 
-plt.tight_layout()
+fig.tight_layout()
 st.pyplot(fig)
 
 st.divider()
@@ -160,24 +198,25 @@ st.divider()
 st.subheader("📋 Trade Log")
 
 if trades:
-    trade_df = pd.DataFrame([
-        {
-            "Date"   : t["date"].date(),
-            "Action" : t["type"],
-            "Price"  : f"${t['price']:.2f}",
-            "Shares" : f"{t['shares']:.4f}",
-        }
-        for t in trades
-    ])
+    # Built straight from the TradeLog columns; formatting is left to column_config
+    trade_df = pd.DataFrame({
+        "Date"   : trades.dates,
+        "Action" : np.where(trades.is_buy, "BUY", "SELL"),
+        "Price"  : trades.prices,
+        "Shares" : trades.shares,
+    })
     st.dataframe(
         trade_df,
         use_container_width=True,
         hide_index=True,
         column_config={
+            "Date": st.column_config.DateColumn("Date", format="YYYY-MM-DD"),
             "Action": st.column_config.TextColumn(
                 "Action",
                 help="BUY or SELL signal"
-            )
+            ),
+            "Price": st.column_config.NumberColumn("Price", format="$%.2f"),
+            "Shares": st.column_config.NumberColumn("Shares", format="%.4f"),
         }
     )
 else:
@@ -5,27 +5,132 @@ Downloads historical price data via yfinance and simulates trades
 based on signals from a strategy object.
 """
 
+import numpy as np
 import yfinance as yf
 import pandas as pd
+from numba import njit
+
+
+def download_prices(ticker: str, start: str, end: str) -> pd.DataFrame:
+    """Download daily OHLCV data for `ticker` from Yahoo Finance."""
+    df = yf.download(ticker, start=start, end=end, progress=False, auto_adjust=True)
+    if df.empty:
+        raise ValueError(f"No data returned for ticker '{ticker}'. Check the symbol and date range.")
+    # Flatten MultiIndex columns if present (yfinance ≥ 0.2.x)
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = df.columns.get_level_values(0)
+    # float32 is plenty for prices and halves the bytes every pass touches.
+    # Volume is left alone: float32 is only exact for integers up to 2**24.
+    df = df.astype({c: np.float32 for c in ("Open", "High", "Low", "Close") if c in df.columns})
+    return df
+
+
+@njit(cache=True)
+def _simulate(close, pos, initial_cash):
+    """
+    All-in / all-out state machine over the daily Close and position arrays.
+
+    Returns the daily portfolio value plus the executed trades as parallel
+    arrays: (values, trade_idx, trade_prices, trade_shares, trade_is_buy).
+    """
+    n            = len(close)
+    values       = np.empty(n, dtype=np.float64)
+    trade_idx    = np.empty(n, dtype=np.int64)
+    trade_prices = np.empty(n, dtype=np.float64)
+    trade_shares = np.empty(n, dtype=np.float64)
+    trade_is_buy = np.empty(n, dtype=np.bool_)
+    n_trades     = 0
+
+    cash   = initial_cash
+    shares = 0.0
+    for i in range(n):
+        price = close[i]
+
+        # BUY signal
+        if pos[i] == 1 and cash > 0:
+            shares = cash / price
+            cash   = 0.0
+            trade_idx[n_trades]    = i
+            trade_prices[n_trades] = price
+            trade_shares[n_trades] = shares
+            trade_is_buy[n_trades] = True
+            n_trades += 1
+
+        # SELL signal
+        elif pos[i] == -1 and shares > 0:
+            cash   = shares * price
+            trade_idx[n_trades]    = i
+            trade_prices[n_trades] = price
+            trade_shares[n_trades] = shares
+            trade_is_buy[n_trades] = False
+            n_trades += 1
+            shares = 0.0
+
+        # Daily portfolio value (a flat book is worth its cash even on a NaN close)
+        values[i] = cash if shares == 0.0 else cash + shares * price
+
+    return (values, trade_idx[:n_trades], trade_prices[:n_trades],
+            trade_shares[:n_trades], trade_is_buy[:n_trades])
+
+
+class TradeLog:
+    """
+    Executed trades stored column-wise: one array per field instead of a
+    dict per trade.
+
+    Iterating yields the per-trade dicts (date, type, price, shares and,
+    for sells, proceeds) for callers that want a row at a time.
+    """
+
+    def __init__(self, dates: pd.DatetimeIndex, prices: np.ndarray, shares: np.ndarray, is_buy: np.ndarray):
+        self.dates  = dates
+        self.prices = prices
+        self.shares = shares
+        self.is_buy = is_buy
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            trade = {
+                "date"   : self.dates[i],
+                "type"   : "BUY" if self.is_buy[i] else "SELL",
+                "price"  : float(self.prices[i]),
+                "shares" : float(self.shares[i]),
+            }
+            if not self.is_buy[i]:
+                trade["proceeds"] = trade["price"] * trade["shares"]
+            yield trade
+
+    def _select(self, mask: np.ndarray) -> "TradeLog":
+        return TradeLog(self.dates[mask], self.prices[mask], self.shares[mask], self.is_buy[mask])
+
+    @property
+    def buys(self) -> "TradeLog":
+        return self._select(self.is_buy)
+
+    @property
+    def sells(self) -> "TradeLog":
+        return self._select(~self.is_buy)
 
 
 class Backtester:
-    def __init__(self, ticker: str, start: str, end: str, initial_cash: float = 10_000):
+    def __init__(self, ticker: str, start: str, end: str, initial_cash: float = 10_000,
+                 data: pd.DataFrame | None = None):
         self.ticker       = ticker.upper()
         self.start        = start
         self.end          = end
         self.initial_cash = initial_cash
+        self.data         = data          # pre-fetched prices (skips the download)
 
     # ── Data ─────────────────────────────────────────────────────────────────
 
     def _fetch_data(self) -> pd.DataFrame:
+        if self.data is not None:
+            return self.data
         print(f"  Downloading {self.ticker} data from Yahoo Finance…")
-        df = yf.download(self.ticker, start=self.start, end=self.end, progress=False, auto_adjust=True)
-        if df.empty:
-            raise ValueError(f"No data returned for ticker '{self.ticker}'. Check the symbol and date range.")
-        # Flatten MultiIndex columns if present (yfinance ≥ 0.2.x)
-        if isinstance(df.columns, pd.MultiIndex):
-            df.columns = df.columns.get_level_values(0)
+        df = download_prices(self.ticker, self.start, self.end)
         print(f"  {len(df)} trading days loaded ({self.start} → {self.end})\n")
         return df
 
@@ -33,75 +138,109 @@ class Backtester:
 
     def run(self, strategy) -> dict:
         """
-        Simulate the strategy and return a results dict containing:
-          - data        : annotated price DataFrame
-          - trades      : list of trade dicts
-          - portfolio   : daily portfolio value Series
-          - buy_hold    : daily buy-and-hold value Series
-          - metrics     : summary statistics dict
+        Fetch prices, generate the strategy's signals and simulate them.
+        Returns the `simulate` results dict plus the strategy under "strategy".
+        """
+        prices  = self._fetch_data()
+        results = self.simulate(prices, strategy.generate_signals(prices))
+        results["strategy"] = strategy
+        return results
+
+    def simulate(self, df: pd.DataFrame, signals: pd.DataFrame) -> dict:
+        """
+        Simulate pre-computed signals (a DataFrame with a 'position' column on
+        the price index) against the prices in `df` and return a results dict
+        containing:
+          - data            : price DataFrame
+          - signals         : the strategy's signal DataFrame
+          - trades          : TradeLog of executed trades
+          - portfolio       : daily portfolio value Series
+          - drawdown        : daily drawdown from the running peak (%) Series
+          - buy_hold_shares : shares held by the buy-and-hold benchmark
+                              (its daily value is Close × buy_hold_shares)
+          - metrics         : summary statistics dict
         """
-        df = self._fetch_data()
-        df = strategy.generate_signals(df)
-
-        cash      = self.initial_cash
-        shares    = 0
-        trades    = []
-        portfolio = []
-
-        for date, row in df.iterrows():
-            price = float(row["Close"])
-
-            # BUY signal
-            if row["position"] == 1 and cash > 0:
-                shares = cash / price
-                cash   = 0
-                trades.append({"date": date, "type": "BUY", "price": price, "shares": shares})
-
-            # SELL signal
-            elif row["position"] == -1 and shares > 0:
-                cash   = shares * price
-                proceeds = cash
-                trades.append({"date": date, "type": "SELL", "price": price, "shares": shares, "proceeds": proceeds})
-                shares = 0
-
-            # Daily portfolio value
-            total = cash + shares * price
-            portfolio.append({"date": date, "value": total})
-
-        # Close any open position at the last price
-        if shares > 0:
-            last_price = float(df["Close"].iloc[-1])
-            cash = shares * last_price
-            shares = 0
-
-        final_value = cash
-
-        # Build time series
-        portfolio_series = pd.DataFrame(portfolio).set_index("date")["value"]
-
-        # Buy-and-hold benchmark
-        first_price = float(df["Close"].dropna().iloc[0])
-        shares_bh   = self.initial_cash / first_price
-        buy_hold    = df["Close"] * shares_bh
-
-        # ── Metrics ──────────────────────────────────────────────────────────
+        # Column views out of a DataFrame block can be strided; the kernel
+        # walks these row by row, so make sure they are C-contiguous.
+        close = np.ascontiguousarray(df["Close"].to_numpy(dtype=np.float32))
+        pos   = np.ascontiguousarray(signals["position"].to_numpy(dtype=np.int8))
+
+        values, trade_idx, trade_prices, trade_shares, trade_is_buy = _simulate(
+            close, pos, float(self.initial_cash)
+        )
+        trades = TradeLog(df.index[trade_idx], trade_prices, trade_shares, trade_is_buy)
+
+        # Build time series — wrap the kernel's preallocated buffer without copying
+        portfolio_series = pd.Series(values, index=df.index, name="value", copy=False)
+
+        # Buy-and-hold benchmark: only the share count is kept; the metrics need
+        # just the final value and plots can rebuild the series as Close × shares
+        shares_bh = self._buy_hold_shares(close)
+
+        metrics, drawdown = self._metrics(values, trades, shares_bh * float(close[-1]))
+
+        return {
+            "data"            : df,
+            "signals"         : signals,
+            "trades"          : trades,
+            "portfolio"       : portfolio_series,
+            "drawdown"        : pd.Series(drawdown, index=df.index, name="drawdown", copy=False),
+            "buy_hold_shares" : shares_bh,
+            "metrics"         : metrics,
+        }
+
+    def run_grid(self, sweep, **grid) -> dict:
+        """
+        Run many parameter sets of one strategy over a single download.
+
+        `sweep(close, **grid)` receives the Close array and yields
+        (key, position) pairs, e.g. MovingAverageCrossover.sweep with
+        short_windows=[...] and long_windows=[...]. Every position array goes
+        through the same simulation kernel as `run`.
+
+        Returns a dict mapping each key to its metrics dict (same keys as
+        results["metrics"] from `run`).
+        """
+        prices = self._fetch_data()
+        close  = np.ascontiguousarray(prices["Close"].to_numpy(dtype=np.float32))
+
+        # Buy-and-hold does not depend on the parameters
+        bh_final = self._buy_hold_shares(close) * float(close[-1])
+
+        results = {}
+        for key, position in sweep(close, **grid):
+            pos = np.ascontiguousarray(position, dtype=np.int8)
+            values, trade_idx, trade_prices, trade_shares, trade_is_buy = _simulate(
+                close, pos, float(self.initial_cash)
+            )
+            trades = TradeLog(prices.index[trade_idx], trade_prices, trade_shares, trade_is_buy)
+            results[key], _ = self._metrics(values, trades, bh_final)
+        return results
+
+    def _buy_hold_shares(self, close: np.ndarray) -> float:
+        """Shares the buy-and-hold benchmark buys at the first valid close."""
+        first_price = float(close[~np.isnan(close)][0])
+        return self.initial_cash / first_price
+
+    def _metrics(self, values: np.ndarray, trades: TradeLog, buy_hold_final: float) -> tuple[dict, np.ndarray]:
+        """Summary statistics plus the daily drawdown (%) for one simulation."""
+        # Any open position is marked at the last close
+        final_value = float(values[-1])
+
         strategy_return = (final_value - self.initial_cash) / self.initial_cash * 100
-        bh_return       = (float(buy_hold.iloc[-1]) - self.initial_cash) / self.initial_cash * 100
-
-        # Max drawdown
-        rolling_max = portfolio_series.cummax()
-        drawdown    = (portfolio_series - rolling_max) / rolling_max
-        max_drawdown = float(drawdown.min()) * 100
-
-        # Win rate
-        sell_trades = [t for t in trades if t["type"] == "SELL"]
-        buy_trades  = [t for t in trades if t["type"] == "BUY"]
-        wins = 0
-        for i, sell in enumerate(sell_trades):
-            if i < len(buy_trades):
-                if sell["price"] > buy_trades[i]["price"]:
-                    wins += 1
-        win_rate = (wins / len(sell_trades) * 100) if sell_trades else 0
+        bh_return       = (buy_hold_final - self.initial_cash) / self.initial_cash * 100
+
+        # Drawdown (%) from the running peak; NaN days (NaN close while
+        # holding) are skipped, as pandas cummax()/min() did
+        rolling_max  = np.fmax.accumulate(values)
+        drawdown     = (values - rolling_max) / rolling_max * 100
+        max_drawdown = float(np.nanmin(drawdown))
+
+        # Win rate — every SELL closes the BUY before it, so pair them up by order
+        buy_trades  = trades.buys
+        sell_trades = trades.sells
+        wins = int(np.sum(sell_trades.prices > buy_trades.prices[:len(sell_trades)]))
+        win_rate = (wins / len(sell_trades) * 100) if len(sell_trades) else 0
 
         metrics = {
             "final_value"      : final_value,
@@ -113,15 +252,7 @@ class Backtester:
             "num_buys"         : len(buy_trades),
             "num_sells"        : len(sell_trades),
         }
-
-        return {
-            "data"      : df,
-            "trades"    : trades,
-            "portfolio" : portfolio_series,
-            "buy_hold"  : buy_hold,
-            "metrics"   : metrics,
-            "strategy"  : strategy,
-        }
+        return metrics, drawdown
 
     # ── Output ────────────────────────────────────────────────────────────────
 
@@ -7,20 +7,37 @@ Produces a 3-panel chart:
   3. Drawdown over time
 """
 
+import os
+import sys
+
+import matplotlib
+
+# With no display to draw on, fall back to the non-interactive Agg backend
+# (avoids GUI backend init); an explicit MPLBACKEND always wins.
+if (sys.platform.startswith("linux")
+        and not (os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+        and "MPLBACKEND" not in os.environ):
+    matplotlib.use("Agg")
+
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 import pandas as pd
 
+# Backends that only write files; plt.show() is pointless with these
+_NON_INTERACTIVE_BACKENDS = {"agg", "cairo", "pdf", "pgf", "ps", "svg", "template"}
+
 
 def plot_results(results: dict, ticker: str, short_window: int, long_window: int):
     data      = results["data"]
+    signals   = results["signals"]
     portfolio = results["portfolio"]
-    buy_hold  = results["buy_hold"]
+    drawdown  = results["drawdown"]
+    buy_hold  = data["Close"] * results["buy_hold_shares"]
     trades    = results["trades"]
     metrics   = results["metrics"]
 
-    buys  = [t for t in trades if t["type"] == "BUY"]
-    sells = [t for t in trades if t["type"] == "SELL"]
+    buys  = trades.buys
+    sells = trades.sells
 
     # ── Figure layout ─────────────────────────────────────────────────────────
     fig, axes = plt.subplots(3, 1, figsize=(14, 12), gridspec_kw={"height_ratios": [3, 2, 1.5]})
@@ -39,20 +56,22 @@ def plot_results(results: dict, ticker: str, short_window: int, long_window: int
         ax.title.set_color("#eeeeee")
 
     # ── Panel 1: Price + MAs + signals ───────────────────────────────────────
+    # Dense time-series layers are rasterized; axes, text and markers stay vector
     ax1 = axes[0]
-    ax1.plot(data.index, data["Close"],    color="#4fc3f7", lw=1.2, label="Close Price", alpha=0.9)
-    ax1.plot(data.index, data["short_ma"], color="#ffb74d", lw=1.4, label=f"{short_window}-day MA", linestyle="--")
-    ax1.plot(data.index, data["long_ma"],  color="#ef5350", lw=1.4, label=f"{long_window}-day MA",  linestyle="--")
+    ax1.plot(data.index, data["Close"],       color="#4fc3f7", lw=1.2, label="Close Price", alpha=0.9, rasterized=True)
+    ax1.plot(data.index, signals["short_ma"], color="#ffb74d", lw=1.4, label=f"{short_window}-day MA", linestyle="--", rasterized=True)
+    ax1.plot(data.index, signals["long_ma"],  color="#ef5350", lw=1.4, label=f"{long_window}-day MA",  linestyle="--", rasterized=True)
+
+    # Full-height trade lines (x in data coords, y in axes fraction like axvline)
+    span = ax1.get_xaxis_transform()
 
     # Buy markers
-    for t in buys:
-        ax1.axvline(t["date"], color="#00e676", alpha=0.15, lw=1)
-        ax1.scatter(t["date"], t["price"], marker="^", color="#00e676", s=100, zorder=5)
+    ax1.vlines(buys.dates, 0, 1, transform=span, colors="#00e676", alpha=0.15, lw=1)
+    ax1.scatter(buys.dates, buys.prices, marker="^", color="#00e676", s=100, zorder=5)
 
     # Sell markers
-    for t in sells:
-        ax1.axvline(t["date"], color="#ff5252", alpha=0.15, lw=1)
-        ax1.scatter(t["date"], t["price"], marker="v", color="#ff5252", s=100, zorder=5)
+    ax1.vlines(sells.dates, 0, 1, transform=span, colors="#ff5252", alpha=0.15, lw=1)
+    ax1.scatter(sells.dates, sells.prices, marker="v", color="#ff5252", s=100, zorder=5)
 
     # Legend entries for signals
     ax1.scatter([], [], marker="^", color="#00e676", s=80, label="BUY signal")
@@ -68,9 +87,9 @@ def plot_results(results: dict, ticker: str, short_window: int, long_window: int
     # ── Panel 2: Portfolio vs Buy & Hold ──────────────────────────────────────
     ax2 = axes[1]
     ax2.plot(portfolio.index, portfolio.values, color="#ba68c8", lw=1.8,
-             label=f"Strategy  ({metrics['strategy_return']:+.1f}%)")
+             label=f"Strategy  ({metrics['strategy_return']:+.1f}%)", rasterized=True)
     ax2.plot(buy_hold.index, buy_hold.values,   color="#4db6ac", lw=1.8,
-             linestyle="--", label=f"Buy & Hold ({metrics['buy_hold_return']:+.1f}%)")
+             linestyle="--", label=f"Buy & Hold ({metrics['buy_hold_return']:+.1f}%)", rasterized=True)
     ax2.axhline(y=portfolio.iloc[0], color="#555566", lw=1, linestyle=":")
 
     ax2.set_title("Portfolio Value vs. Buy & Hold Benchmark")
@@ -82,10 +101,8 @@ def plot_results(results: dict, ticker: str, short_window: int, long_window: int
 
     # ── Panel 3: Drawdown ─────────────────────────────────────────────────────
     ax3 = axes[2]
-    rolling_max = portfolio.cummax()
-    drawdown    = (portfolio - rolling_max) / rolling_max * 100
-    ax3.fill_between(drawdown.index, drawdown.values, 0, color="#ef5350", alpha=0.5)
-    ax3.plot(drawdown.index, drawdown.values, color="#ef5350", lw=1)
+    ax3.fill_between(drawdown.index, drawdown.values, 0, color="#ef5350", alpha=0.5, rasterized=True)
+    ax3.plot(drawdown.index, drawdown.values, color="#ef5350", lw=1, rasterized=True)
     ax3.axhline(0, color="#555566", lw=0.8)
 
     ax3.set_title(f"Strategy Drawdown  (Max: {metrics['max_drawdown']:.1f}%)")
@@ -115,4 +132,6 @@ def plot_results(results: dict, ticker: str, short_window: int, long_window: int
     output_path = "backtest_results.png"
     plt.savefig(output_path, dpi=150, bbox_inches="tight", facecolor=fig.get_facecolor())
     print(f"  Chart saved → {output_path}")
-    plt.show()
+    if matplotlib.get_backend().lower() not in _NON_INTERACTIVE_BACKENDS:
+        plt.show()
+    plt.close(fig)
@@ -1,13 +1,113 @@
 """
 strategy.py — Trading strategy definitions.
 
-A strategy receives a DataFrame of price data and returns a Series of signals:
+A strategy receives a DataFrame of price data and returns a DataFrame of
+signal columns on the same index. Its 'position' column holds the trade signal:
     +1  = BUY
      0  = HOLD
     -1  = SELL
 """
 
+import numpy as np
 import pandas as pd
+from numba import njit
+
+
+@njit(cache=True)
+def _window_step(close, i, window, acc, nans):
+    """
+    Advance one trailing window to row `i`: add close[i], drop the close that
+    falls out, and return the updated (acc, nans, mean). Like pandas
+    rolling().mean(), the mean is NaN until the window fills and while any
+    NaN close is inside the window; NaNs are counted rather than added, so
+    the running sum recovers once they drop out.
+    """
+    x = close[i]
+    if np.isnan(x):
+        nans += 1
+    else:
+        acc += x
+    if i >= window:
+        y = close[i - window]
+        if np.isnan(y):
+            nans -= 1
+        else:
+            acc -= y
+    mean = acc / window if i >= window - 1 and nans == 0 else np.nan
+    return acc, nans, mean
+
+
+@njit(cache=True)
+def _cross_step(short_ma, long_ma, prev):
+    """
+    Signal for one row (1 while short > long, else 0 — including while an MA
+    is NaN) and the position, its change from `prev`: +1 → just crossed up
+    (BUY), -1 → just crossed down (SELL), 0 → no change.
+    """
+    sig = 1 if short_ma > long_ma else 0
+    return sig, sig - prev
+
+
+@njit(cache=True)
+def _moving_average(close, window):
+    """
+    Trailing simple moving average with NaN handling as in `_window_step`.
+    Keeps the (float) dtype of `close`; the running sum is float64.
+    """
+    n    = len(close)
+    out  = np.empty(n, dtype=close.dtype)
+    acc  = 0.0
+    nans = 0
+    for i in range(n):
+        acc, nans, out[i] = _window_step(close, i, window, acc, nans)
+    return out
+
+
+@njit(cache=True)
+def _crossover(short_ma, long_ma):
+    """int8 signal and position arrays for two precomputed MAs (see `_cross_step`)."""
+    n        = len(short_ma)
+    signal   = np.zeros(n, dtype=np.int8)
+    position = np.zeros(n, dtype=np.int8)
+    prev = 0
+    for i in range(n):
+        prev, position[i] = _cross_step(short_ma[i], long_ma[i], prev)
+        signal[i] = prev
+    return signal, position
+
+
+@njit(cache=True)
+def _dual_sma(close, short_window, long_window):
+    """
+    Both moving averages plus the crossover signal/position in one pass.
+
+    Keeps a running sum per window and writes signal/position inline, so
+    `close` is read once. MAs keep the (float) dtype of `close`.
+    """
+    n        = len(close)
+    short_ma = np.empty(n, dtype=close.dtype)
+    long_ma  = np.empty(n, dtype=close.dtype)
+    signal   = np.zeros(n, dtype=np.int8)
+    position = np.zeros(n, dtype=np.int8)
+
+    sum_s, nans_s = 0.0, 0
+    sum_l, nans_l = 0.0, 0
+    prev = 0
+    for i in range(n):
+        sum_s, nans_s, short_ma[i] = _window_step(close, i, short_window, sum_s, nans_s)
+        sum_l, nans_l, long_ma[i]  = _window_step(close, i, long_window,  sum_l, nans_l)
+        prev, position[i] = _cross_step(short_ma[i], long_ma[i], prev)
+        signal[i] = prev
+
+    return short_ma, long_ma, signal, position
+
+
+def _float_close(df: pd.DataFrame) -> np.ndarray:
+    """Close as a C-contiguous float array (integer prices are widened to float64)."""
+    close = df["Close"].to_numpy()
+    if close.dtype.kind != "f":
+        close = close.astype(np.float64)
+    return np.ascontiguousarray(close)
 
 
 class MovingAverageCrossover:
@@ -33,21 +133,30 @@ class MovingAverageCrossover:
 
         Returns
         -------
-        df : original DataFrame with added columns:
-               short_ma, long_ma, signal, position
+        signals : DataFrame on the same index with only the columns
+                  short_ma, long_ma, signal, position
         """
-        data = df.copy()
+        short_ma, long_ma, signal, position = _dual_sma(
+            _float_close(df), self.short_window, self.long_window
+        )
 
-        # Compute moving averages
-        data["short_ma"] = data["Close"].rolling(window=self.short_window).mean()
-        data["long_ma"]  = data["Close"].rolling(window=self.long_window).mean()
+        return pd.DataFrame(
+            {"short_ma": short_ma, "long_ma": long_ma, "signal": signal, "position": position},
+            index=df.index,
+        )
 
-        # Raw signal: 1 when short > long, 0 otherwise
-        data["signal"] = 0
-        data.loc[data["short_ma"] > data["long_ma"], "signal"] = 1
-
-        # Position = difference of signal to detect crossover events
-        # +1 → just crossed up (BUY), -1 → just crossed down (SELL), 0 → no change
-        data["position"] = data["signal"].diff()
+    @staticmethod
+    def sweep(close: np.ndarray, short_windows: list[int], long_windows: list[int]):
+        """
+        Positions for every (short, long) window pair with short < long, for
+        Backtester.run_grid. Each distinct window's moving average is computed
+        once and shared by all pairs that use it.
 
-        return data
+        Yields ((short_window, long_window), position) pairs.
+        """
+        mas = {w: _moving_average(close, w) for w in set(short_windows) | set(long_windows)}
+        for short_window in short_windows:
+            for long_window in long_windows:
+                if short_window < long_window:
+                    _, position = _crossover(mas[short_window], mas[long_window])
+                    yield (short_window, long_window), position
@@ -0,0 +1,143 @@
+"""
+test_backtester.py — Checks the simulation engine against a plain reference loop.
+
+Run: python -m pytest
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtester import Backtester
+from strategy import MovingAverageCrossover
+
+INITIAL_CASH = 10_000
+
+
+def _prices(close) -> pd.DataFrame:
+    return pd.DataFrame({"Close": close}, index=pd.bdate_range("2020-01-01", periods=len(close)))
+
+
+def _random_walk(seed: int, n: int = 1260) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+
+
+def _reference(df: pd.DataFrame, short_window: int, long_window: int):
+    """Row-by-row all-in / all-out simulation, written for clarity rather than speed."""
+    # Same float32 prices and MAs as the engine, so crossovers land on the same days
+    close    = df["Close"].astype(np.float32).astype(np.float64)
+    short_ma = close.rolling(short_window).mean().astype(np.float32)
+    long_ma  = close.rolling(long_window).mean().astype(np.float32)
+    position = (short_ma > long_ma).astype(int).diff().fillna(0)
+
+    cash, shares = float(INITIAL_CASH), 0.0
+    trades, values = [], []
+    for date, price, pos in zip(df.index, close, position):
+        if pos == 1 and cash > 0:
+            shares, cash = cash / price, 0.0
+            trades.append((date, "BUY", price))
+        elif pos == -1 and shares > 0:
+            cash, shares = shares * price, 0.0
+            trades.append((date, "SELL", price))
+        values.append(cash if shares == 0 else cash + shares * price)
+
+    final_value = cash if shares == 0 else shares * close.iloc[-1]
+    values      = pd.Series(values)
+    rolling_max = values.cummax()
+
+    buys  = [t[2] for t in trades if t[1] == "BUY"]
+    sells = [t[2] for t in trades if t[1] == "SELL"]
+    wins  = sum(sell > buy for sell, buy in zip(sells, buys))
+
+    first_price = close.dropna().iloc[0]
+    metrics = {
+        "final_value"     : final_value,
+        "strategy_return" : (final_value - INITIAL_CASH) / INITIAL_CASH * 100,
+        "buy_hold_return" : (close.iloc[-1] / first_price - 1) * 100,
+        "max_drawdown"    : ((values - rolling_max) / rolling_max).min() * 100,
+        "total_trades"    : len(trades),
+        "win_rate"        : wins / len(sells) * 100 if sells else 0,
+        "num_buys"        : len(buys),
+        "num_sells"       : len(sells),
+    }
+    return trades, metrics
+
+
+def _check(df: pd.DataFrame, short_window: int, long_window: int) -> dict:
+    bt      = Backtester("TEST", "", "", initial_cash=INITIAL_CASH, data=df)
+    results = bt.run(MovingAverageCrossover(short_window, long_window))
+    expected_trades, expected = _reference(df, short_window, long_window)
+
+    trades = list(results["trades"])
+    assert [(t["date"], t["type"]) for t in trades] == [(d, k) for d, k, _ in expected_trades]
+    np.testing.assert_allclose([t["price"] for t in trades], [p for _, _, p in expected_trades],
+                               rtol=1e-6, equal_nan=True)
+    for key, value in expected.items():
+        np.testing.assert_allclose(results["metrics"][key], value, rtol=1e-6, equal_nan=True, err_msg=key)
+    return results
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("windows", [(5, 20), (20, 50), (50, 200)])
+def test_matches_reference(seed, windows):
+    _check(_prices(_random_walk(seed)), *windows)
+
+
+def _rally_into_the_end() -> np.ndarray:
+    # Slide down then rally into the end, so the last trade is a BUY still held
+    return np.concatenate([np.linspace(200, 100, 150), np.linspace(100, 180, 100)])
+
+
+def test_open_position_is_marked_at_last_close():
+    results = _check(_prices(_rally_into_the_end()), 10, 30)
+    assert list(results["trades"])[-1]["type"] == "BUY"
+    assert results["metrics"]["final_value"] == pytest.approx(results["portfolio"].iloc[-1])
+
+
+def test_nan_close_in_the_middle():
+    close = _random_walk(7)
+    close[300] = np.nan
+    results = _check(_prices(close), 20, 50)
+    assert np.isfinite(results["metrics"]["max_drawdown"])
+
+
+def test_nan_close_on_the_last_day_while_flat():
+    close = np.concatenate([np.linspace(100, 200, 150), np.linspace(200, 120, 100)])
+    close[-1] = np.nan
+    results = _check(_prices(close), 10, 30)
+    assert list(results["trades"])[-1]["type"] == "SELL"
+    assert np.isfinite(results["metrics"]["final_value"])
+
+
+def test_nan_close_on_the_last_day_while_holding():
+    # The NaN blanks the MAs, which reads as a cross down: the open position
+    # is sold at a NaN price, exactly as in the reference loop
+    close = _rally_into_the_end()
+    close[-1] = np.nan
+    results = _check(_prices(close), 10, 30)
+    last = list(results["trades"])[-1]
+    assert last["type"] == "SELL" and last["date"] == results["data"].index[-1]
+    assert np.isnan(results["metrics"]["final_value"])
+
+
+def test_windows_longer_than_the_data():
+    results = _check(_prices(_random_walk(3, n=30)), 20, 50)
+    m = results["metrics"]
+    assert m["total_trades"] == 0
+    assert m["final_value"] == INITIAL_CASH
+    assert m["max_drawdown"] == 0
+    assert m["win_rate"] == 0
+
+
+def test_run_grid_matches_run_for_every_pair():
+    close = _random_walk(11)
+    close[400] = np.nan
+    bt = Backtester("TEST", "", "", initial_cash=INITIAL_CASH, data=_prices(close))
+
+    grid = bt.run_grid(MovingAverageCrossover.sweep, short_windows=[5, 20, 50], long_windows=[20, 50, 200])
+    assert set(grid) == {(5, 20), (5, 50), (5, 200), (20, 50), (20, 200), (50, 200)}
+    for (short_window, long_window), metrics in grid.items():
+        expected = bt.run(MovingAverageCrossover(short_window, long_window))["metrics"]
+        assert metrics.keys() == expected.keys()
+        np.testing.assert_array_equal(list(metrics.values()), list(expected.values()))
@@ -0,0 +1,60 @@
+"""
+test_strategy.py — Checks the MA crossover kernels against pandas.
+
+Run: python -m pytest
+"""
+
+import numpy as np
+import pandas as pd
+
+from strategy import MovingAverageCrossover
+
+
+def _prices(close) -> pd.DataFrame:
+    return pd.DataFrame({"Close": close}, index=pd.bdate_range("2020-01-01", periods=len(close)))
+
+
+def _check_against_pandas(df: pd.DataFrame, short_window: int, long_window: int):
+    signals = MovingAverageCrossover(short_window, long_window).generate_signals(df)
+    close   = df["Close"].astype(np.float64)
+    for col, window in (("short_ma", short_window), ("long_ma", long_window)):
+        expected = close.rolling(window).mean().to_numpy()
+        np.testing.assert_allclose(signals[col].to_numpy(), expected, rtol=1e-5, equal_nan=True)
+
+
+def test_moving_averages_match_pandas():
+    rng = np.random.default_rng(0)
+    close = (100 * np.exp(np.cumsum(rng.normal(0, 0.02, 1260)))).astype(np.float32)
+    _check_against_pandas(_prices(close), 20, 50)
+
+
+def test_nan_close_only_blanks_the_windows_containing_it():
+    rng = np.random.default_rng(1)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, 1260)))
+    close[300] = np.nan
+    df = _prices(close)
+    _check_against_pandas(df, 20, 50)
+
+    # Trading resumes once the NaN leaves the long window
+    position = MovingAverageCrossover(20, 50).generate_signals(df)["position"].to_numpy()
+    assert np.any(position[350:] != 0)
+
+
+def test_integer_close_gives_float_averages():
+    df = _prices(np.arange(1, 101, dtype=np.int64))
+    signals = MovingAverageCrossover(5, 10).generate_signals(df)
+    assert signals["short_ma"].dtype.kind == "f"
+    _check_against_pandas(df, 5, 10)
+
+
+def test_sweep_matches_generate_signals():
+    rng = np.random.default_rng(2)
+    close = (100 * np.exp(np.cumsum(rng.normal(0, 0.02, 800)))).astype(np.float32)
+    close[200] = np.nan
+    df = _prices(close)
+
+    swept = dict(MovingAverageCrossover.sweep(close, [5, 20], [20, 50]))
+    assert set(swept) == {(5, 20), (5, 50), (20, 50)}
+    for (short_window, long_window), position in swept.items():
+        expected = MovingAverageCrossover(short_window, long_window).generate_signals(df)["position"]
+        np.testing.assert_array_equal(position, expected.to_numpy())